@@ -1,17 +1,64 @@
 import os
+import re
+import sys
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
+from urllib.parse import parse_qsl, unquote_plus
 
 import i18n
 from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 # Translation setup
 TRANSLATIONS_DIR = Path("translations")
-SUPPORTED_LANGUAGES = ["en", "es", "fr"]
+SUPPORTED_LANGUAGES = [sys.intern(code) for code in ("en", "es", "fr")]
 DEFAULT_LANGUAGE = "en"
+# Set view of SUPPORTED_LANGUAGES for membership checks; the list keeps the
+# public ordering used in API responses.
+_SUPPORTED = frozenset(SUPPORTED_LANGUAGES)
+
+# Region subtags commonly sent alongside the supported languages. Every
+# ``<language>-<region>`` pair is precomputed into _LANG_MAP so normalising a
+# typical tag is a single dict lookup; other tags take the prefix fallback.
+COMMON_REGIONS = (
+    "us", "gb", "au", "ca", "nz", "ie", "in", "za",
+    "es", "mx", "ar", "co", "cl", "pe", "ve", "419",
+    "fr", "be", "ch", "lu", "mc",
+)
+_LANG_MAP: dict[str, str] = {
+    **{code: code for code in SUPPORTED_LANGUAGES},
+    **{f"{code}-{region}": code for code in SUPPORTED_LANGUAGES for region in COMMON_REGIONS},
+}
+# Supported codes as raw header bytes, for matching before any decoding
+_SUPPORTED_BYTES = {code.encode("ascii"): code for code in SUPPORTED_LANGUAGES}
+
+# Translations that take no parameters, resolved once per locale by
+# load_templates() and served through static_translation().
+_STATIC_TRANSLATIONS: dict[tuple[str, str], str] = {}
+
+# Translations per locale, converted from python-i18n's ``%{name}``
+# placeholders to ``str.format`` templates. Plural keys are kept separately as
+# a dict of forms (zero/one/few/many/other).
+_TEMPLATES: dict[str, dict[str, str]] = {}
+_PLURAL_TEMPLATES: dict[str, dict[str, dict[str, str]]] = {}
+
+# One ``Accept-Language`` item: the language range, then its parameter
+# section up to the next comma. _QUALITY_RE finds ``q=`` anywhere in that
+# section, so it is honoured even after other parameters.
+_ACCEPT_LANG_RE = re.compile(r'\s*([^,;\s]+)([^,]*)')
+_QUALITY_RE = re.compile(r';\s*q\s*=\s*([0-9.]+)', re.IGNORECASE)
+# A ``lang`` field in a raw ASGI query string, with or without ``=value``;
+# the value is still percent-encoded. Only valid when the key itself cannot
+# be percent-encoded, i.e. the query string has no ``%``.
+_LANG_QUERY_RE = re.compile(rb'(?:^|&)lang(?:=([^&]*))?(?=&|$)')
+# python-i18n placeholders: ``%%``, ``%{name}`` or ``%name``. Like
+# string.Template, names are ASCII identifiers only.
+_PLACEHOLDER_RE = re.compile(r'%(?:(%)|\{([_a-zA-Z][_a-zA-Z0-9]*)\}|([_a-zA-Z][_a-zA-Z0-9]*))')
 
 def setup_i18n():
     """Initialize i18n configuration"""
@@ -26,55 +73,249 @@ def setup_i18n():
     i18n.load_path.clear()
     i18n.load_path.append(str(TRANSLATIONS_DIR))
 
-def parse_accept_language(accept_language: str) -> list[tuple[str, float]]:
-    """Parse an ``Accept-Language`` header into ordered language options."""
-    if not accept_language:
-        return []
-
-    languages: list[tuple[str, float]] = []
-    for item in accept_language.split(','):
-        cleaned = item.strip()
-        if not cleaned:
-            continue
-
-        lang, _, quality_value = cleaned.partition(';q=')
-        try:
-            quality = float(quality_value) if quality_value else 1.0
-        except ValueError:
-            quality = 1.0
-
-        languages.append((lang.strip().lower(), quality))
-
-    return sorted(languages, key=lambda option: option[1], reverse=True)
-
+    load_templates()
+
+def _ensure_loaded():
+    """Run setup_i18n() if the translation tables have not been filled yet.
+
+    Startup fills them from the lifespan; this covers the app being served
+    without it (e.g. mounted as a sub-app).
+    """
+    if not (_STATIC_TRANSLATIONS and _TEMPLATES):
+        setup_i18n()
+
+def static_translation(key: str, language: str) -> str:
+    """Return a precomputed parameterless translation."""
+    _ensure_loaded()
+    return _STATIC_TRANSLATIONS[(key, language)]
+
+def _to_format_template(template: str) -> str:
+    """Convert a python-i18n template into a ``str.format`` one.
+
+    ``%{name}`` becomes the field ``{name}`` and ``%name`` becomes ``{%name}``,
+    so render_template() can restore the original text of either form when
+    a value is missing.
+    """
+    parts: list[str] = []
+    position = 0
+    for match in _PLACEHOLDER_RE.finditer(template):
+        parts.append(template[position:match.start()].replace('{', '{{').replace('}', '}}'))
+        escaped, braced, bare = match.groups()
+        if escaped:
+            parts.append('%')
+        elif braced:
+            parts.append('{%s}' % braced)
+        else:
+            parts.append('{%%%s}' % bare)
+        position = match.end()
+    parts.append(template[position:].replace('{', '{{').replace('}', '}}'))
+    return ''.join(parts)
+
+class _PlaceholderValues(dict):
+    """Values for render_template() that mimic ``Template.safe_substitute``.
+
+    A placeholder with no value is left as it was written, unless
+    python-i18n's ``error_on_missing_placeholder`` is set.
+    """
+
+    def __missing__(self, field: str) -> str:
+        name = field.lstrip('%')
+        if name in self:
+            return self[name]
+        if i18n.config.get('error_on_missing_placeholder'):
+            raise KeyError(name)
+        return field if field.startswith('%') else '%%{%s}' % field
+
+def render_template(template: str, **values) -> str:
+    """Fill a template from _to_format_template() the way ``i18n.t`` would."""
+    return template.format_map(_PlaceholderValues(values))
+
+def load_templates():
+    """Read the translation files once and build every translation table.
+
+    Files are located and parsed with python-i18n's own loader and settings,
+    so a missing file or locale fails here at startup rather than on a
+    request. Missing keys fall back to the default language, as with
+    ``i18n.t``.
+    """
+    filename_format = i18n.config.get('filename_format')
+    file_format = i18n.config.get('file_format')
+    skip_root = i18n.config.get('skip_locale_root_data')
+
+    raw: dict[str, dict] = {}
+    for locale in SUPPORTED_LANGUAGES:
+        filename = filename_format.format(locale=locale, format=file_format)
+        raw[locale] = i18n.resource_loader.load_resource(
+            str(TRANSLATIONS_DIR / filename), None if skip_root else locale
+        )
+
+    _STATIC_TRANSLATIONS.clear()
+    _TEMPLATES.clear()
+    _PLURAL_TEMPLATES.clear()
+    for locale in SUPPORTED_LANGUAGES:
+        templates: dict[str, str] = {}
+        plural_templates: dict[str, dict[str, str]] = {}
+        for key, value in {**raw[DEFAULT_LANGUAGE], **raw[locale]}.items():
+            if isinstance(value, dict):
+                plural_templates[key] = {form: _to_format_template(text) for form, text in value.items()}
+                continue
+
+            templates[key] = _to_format_template(value)
+            # Strings without placeholders are rendered once, up front
+            if not any(match.group(2) or match.group(3) for match in _PLACEHOLDER_RE.finditer(value)):
+                _STATIC_TRANSLATIONS[(key, locale)] = render_template(templates[key])
+        _TEMPLATES[locale] = templates
+        _PLURAL_TEMPLATES[locale] = plural_templates
+
+def translation_template(key: str, language: str) -> str:
+    """Return the ``str.format`` template for ``key``."""
+    _ensure_loaded()
+    return _TEMPLATES[language][key]
+
+def plural_template(key: str, language: str, count: int) -> str:
+    """Return the ``str.format`` template for the plural form of ``count``.
+
+    Forms are picked the same way python-i18n does: a missing form falls back
+    to ``other``/``many`` and then to the key itself, unless
+    ``error_on_missing_plural`` is set.
+    """
+    _ensure_loaded()
+    forms = _PLURAL_TEMPLATES[language][key]
+
+    if count == 0:
+        if 'zero' in forms:
+            return forms['zero']
+    elif count == 1:
+        if 'one' in forms:
+            return forms['one']
+    elif count <= i18n.config.get('plural_few'):
+        if 'few' in forms:
+            return forms['few']
+    if 'other' in forms:
+        return forms['other']
+    if 'many' in forms:
+        return forms['many']
+    if i18n.config.get('error_on_missing_plural'):
+        raise KeyError('"many" not defined for key {0}'.format(key))
+    return key
+
+def _parse_quality(parameters: str) -> float:
+    """Return the q-value from an item's parameters, defaulting to 1.0.
+
+    A missing or unparseable q-value counts as 1.0. Values are clamped to
+    [0, 1], the qvalue range allowed by RFC 9110.
+    """
+    match = _QUALITY_RE.search(parameters) if ';' in parameters else None
+    if not match:
+        return 1.0
+    try:
+        return min(float(match.group(1)), 1.0)
+    except ValueError:
+        return 1.0
+
+@lru_cache(maxsize=512)
 def normalise_language(language: Optional[str]) -> Optional[str]:
-    """Return a supported language code or ``None`` if unavailable."""
+    """Return a supported language code or ``None`` if unavailable.
+
+    The returned code is interned, so later dict and set lookups keyed by the
+    supported codes can match on identity.
+    """
     if not language:
         return None
 
     language = language.lower()
-    if language in SUPPORTED_LANGUAGES:
-        return language
+    selected = _LANG_MAP.get(language)
+    if selected:
+        return selected
 
     if '-' in language:
         prefix = language.split('-', 1)[0]
-        if prefix in SUPPORTED_LANGUAGES:
-            return prefix
+        if prefix in _SUPPORTED:
+            return sys.intern(prefix)
 
     return None
 
+def _fast_resolve(header: str) -> Optional[str]:
+    """Return the highest-q supported language in ``header`` without sorting.
+
+    Ties go to the earliest entry, the same result as a stable sort by q.
+    A supported entry with q=1.0 cannot be beaten, so the scan stops there;
+    that is the common case.
+    """
+    best_language: Optional[str] = None
+    best_quality = -1.0
+    for match in _ACCEPT_LANG_RE.finditer(header):
+        selected = normalise_language(match.group(1))
+        if not selected:
+            continue
+
+        quality = _parse_quality(match.group(2))
+        if quality >= 1.0:
+            return selected
+        if quality > best_quality:
+            best_language, best_quality = selected, quality
+
+    return best_language
+
+@lru_cache(maxsize=2048)
+def _resolve_accept_language(header: str) -> Optional[str]:
+    """Resolve a raw ``Accept-Language`` header to a supported language.
+
+    Clients send very few distinct headers, so the result is cached per
+    header string.
+    """
+    return _fast_resolve(header)
+
+def _resolve_accept_language_bytes(header: bytes) -> Optional[str]:
+    """Resolve a raw ``Accept-Language`` header value without decoding it first.
+
+    When the first entry is a supported code (optionally with a region) and
+    carries no q-value, it has the implicit q=1.0 and wins outright, so it is
+    matched on the bytes directly. Anything else goes through the full
+    resolver.
+    """
+    end = header.find(b",")
+    first = (header if end == -1 else header[:end]).strip()
+    code = _SUPPORTED_BYTES.get(first[:2].lower())
+    if code and (len(first) == 2 or first[2:3] == b"-") and b";" not in first:
+        return code
+
+    return _resolve_accept_language(header.decode("latin-1"))
+
+def _query_language(query_string: bytes) -> Optional[str]:
+    """Return the last ``lang`` value in ``query_string``, as ``QueryParams`` would.
+
+    Query strings without ``%`` are matched with a regex; anything that may
+    carry percent-encoded keys goes through ``parse_qsl`` like Starlette does.
+    """
+    if b"%" in query_string:
+        value = None
+        for name, field_value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True):
+            if name == "lang":
+                value = field_value
+        return value
+
+    query_values = _LANG_QUERY_RE.findall(query_string)
+    if not query_values:
+        return None
+    return unquote_plus(query_values[-1].decode("latin-1"))
+
+def detect_language(scope: Scope) -> str:
+    """Pick the best matching language from the incoming request scope.
 
-def detect_language(request: Request) -> str:
-    """Pick the best matching language from the incoming request."""
-    query_language = normalise_language(request.query_params.get("lang"))
+    Reads the raw query string and headers directly so no ``Request``,
+    ``QueryParams`` or ``Headers`` objects are built per request.
+    """
+    query_language = normalise_language(_query_language(scope.get("query_string", b"")))
     if query_language:
         return query_language
 
-    header_language = request.headers.get("accept-language", "")
-    for language, _ in parse_accept_language(header_language):
-        selected = normalise_language(language)
-        if selected:
-            return selected
+    for name, value in scope["headers"]:
+        if name == b"accept-language":
+            header_language = _resolve_accept_language_bytes(value)
+            if header_language:
+                return header_language
+            break
 
     return DEFAULT_LANGUAGE
 
@@ -95,17 +336,34 @@ app = FastAPI(
 )
 
 # Add middleware
+class I18nMiddleware:
+    """Attach the detected language to the request and mark the response.
+
+    Implemented as plain ASGI rather than ``@app.middleware("http")`` to avoid
+    the extra task and body streaming that ``BaseHTTPMiddleware`` adds to
+    every request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        language = detect_language(scope)
+        scope.setdefault("state", {})["language"] = language
+
+        async def send_with_language(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["content-language"] = language
+            await send(message)
 
+        await self.app(scope, receive, send_with_language)
 
-@app.middleware("http")
-async def add_language_to_request(request: Request, call_next):
-    """Attach the detected language to the request and mark the response."""
-    language = detect_language(request)
-    request.state.language = language
 
-    response = await call_next(request)
-    response.headers["Content-Language"] = language
-    return response
+app.add_middleware(I18nMiddleware)
 
 # Response models
 class WelcomeResponse(BaseModel):
@@ -113,10 +371,6 @@ class WelcomeResponse(BaseModel):
     language: str
     user_name: Optional[str] = None
 
-class ErrorResponse(BaseModel):
-    error: str
-    language: str
-
 class CountResponse(BaseModel):
     message: str
     count: int
@@ -133,25 +387,22 @@ async def welcome(request: Request, name: Optional[str] = Query(None)):
     language = request.state.language
     
     if name:
-        message = i18n.t('welcome_with_name', locale=language, name=name)
+        message = render_template(translation_template('welcome_with_name', language), name=name)
     else:
-        message = i18n.t('welcome', locale=language)
+        message = static_translation('welcome', language)
     
-    return WelcomeResponse(
-        message=message,
-        language=language,
-        user_name=name
-    )
+    return {"message": message, "language": language, "user_name": name}
 
 @app.get("/hello", response_model=WelcomeResponse)
 async def hello(request: Request):
     """Simple hello endpoint"""
     language = request.state.language
     
-    return WelcomeResponse(
-        message=i18n.t('hello', locale=language),
-        language=language
-    )
+    return {
+        "message": static_translation('hello', language),
+        "language": language,
+        "user_name": None,
+    }
 
 @app.get("/count/{number}", response_model=CountResponse)
 async def count_items(request: Request, number: int):
@@ -159,31 +410,23 @@ async def count_items(request: Request, number: int):
     language = request.state.language
     
     if number < 0:
-        error_message = i18n.t('negative_number_error', locale=language)
+        error_message = static_translation('negative_number_error', language)
         raise HTTPException(status_code=400, detail=error_message)
     
-    # Use python-i18n's built-in pluralization
-    message = i18n.t('item_count', locale=language, count=number)
+    message = render_template(plural_template('item_count', language, number), count=number)
     
-    return CountResponse(
-        message=message,
-        count=number,
-        language=language
-    )
+    return {"message": message, "count": number, "language": language}
 
 @app.get("/error-demo")
 async def error_demo(request: Request):
     """Endpoint demonstrating localized error messages"""
     language = request.state.language
     
-    error_message = i18n.t('error_demo', locale=language)
+    error_message = static_translation('error_demo', language)
     
     return JSONResponse(
         status_code=400,
-        content=ErrorResponse(
-            error=error_message,
-            language=language
-        ).model_dump()
+        content={"error": error_message, "language": language}
     )
 
 @app.get("/language-info", response_model=LanguageInfo)
@@ -191,11 +434,11 @@ async def language_info(request: Request):
     """Get current language information"""
     language = request.state.language
     
-    return LanguageInfo(
-        current_language=language,
-        supported_languages=SUPPORTED_LANGUAGES,
-        message=i18n.t('language_info', locale=language)
-    )
+    return {
+        "current_language": language,
+        "supported_languages": SUPPORTED_LANGUAGES,
+        "message": static_translation('language_info', language),
+    }
 
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import i18n
+import pytest
+from i18n.translator import TranslationFormatter
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def translations(monkeypatch):
+    """Load the real translation files from the project directory."""
+    monkeypatch.chdir(Path(__file__).parent)
+    main.setup_i18n()
+
+
+@pytest.mark.parametrize(
+    "template, values",
+    [
+        ("100%sure %{name}", {"name": "Bob"}),
+        ("%{count} %{name}", {"name": "Bob"}),
+        ("%{namé} %{name}", {"name": "Bob"}),
+        ("%% %name %{name}", {"name": "Bob"}),
+        ("{braces} %{name}", {"name": "{x}"}),
+        ("trailing %", {}),
+    ],
+)
+def test_render_template_matches_python_i18n(template, values):
+    expected = TranslationFormatter(template).format(**values)
+    assert main.render_template(main._to_format_template(template), **values) == expected
+
+
+@pytest.mark.parametrize("language", main.SUPPORTED_LANGUAGES)
+def test_translations_match_i18n_t(language):
+    for name in ("Ann", "{x}", "%{name}"):
+        expected = i18n.t("welcome_with_name", locale=language, name=name)
+        template = main.translation_template("welcome_with_name", language)
+        assert main.render_template(template, name=name) == expected
+
+    for count in range(8):
+        expected = i18n.t("item_count", locale=language, count=count)
+        template = main.plural_template("item_count", language, count)
+        assert main.render_template(template, count=count) == expected
+
+
+@pytest.mark.parametrize("language", main.SUPPORTED_LANGUAGES)
+def test_static_translations_match_i18n_t(language):
+    keys = [key for key, locale in main._STATIC_TRANSLATIONS if locale == language]
+    assert "hello" in keys
+    for key in keys:
+        assert main.static_translation(key, language) == i18n.t(key, locale=language)